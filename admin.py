@@ -1,9 +1,5 @@
 import streamlit as st
-import google.generativeai as genai
-import os
-import PyPDF2 as pdf
 from dotenv import load_dotenv
-import json
 from sqlalchemy import (
     create_engine, Column, String, Integer, Text, DateTime, LargeBinary, ForeignKey
 )
@@ -13,6 +9,8 @@ from sqlalchemy.orm import joinedload
 import base64
 import pytz
 import pandas as pd
+from evaluation import create_tables, DB_PATH
+from worker_client import submit_evaluation, worker_ready, WorkerError
 
 # Set page config early
 st.set_page_config(page_title="Smart ATS Management", layout="wide", initial_sidebar_state="expanded")
@@ -43,6 +41,7 @@ class EvaluationResult(Base):
     email = Column(String)
     resume_name = Column(String)
     resume_file = Column(LargeBinary)
+    resume_sha256 = Column(String)
     job_description_id = Column(Integer, ForeignKey('job_descriptions.id'))
     match_percent = Column(String)
     summary = Column(Text)
@@ -53,17 +52,19 @@ class EvaluationResult(Base):
     job_description_rel = relationship("JobDescription", back_populates="evaluations")
 
 # --- Create DB ---
-engine = create_engine('sqlite:///ats_results.db')
+create_tables()
+engine = create_engine(f'sqlite:///{DB_PATH}')
 Base.metadata.create_all(engine)
 Session = sessionmaker(bind=engine)
 
 
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-if GOOGLE_API_KEY:
-    genai.configure(api_key=GOOGLE_API_KEY)
-else:
-    st.sidebar.error("Google API key not found. Please check your .env.")
-    st.stop()
+# Cached so reruns (e.g. every table selection) don't each wait on a health check
+@st.cache_data(ttl=30, show_spinner=False)
+def cached_worker_ready():
+    return worker_ready()
+
+if not cached_worker_ready():
+    st.sidebar.error("Evaluation worker is not reachable. Start it with `python worker.py`.")
 
 # Custom CSS
 st.markdown("""
@@ -166,38 +167,104 @@ def get_resume_download_link(evaluation):
     href = f'<a href="data:application/pdf;base64,{resume_b64}" download="{evaluation.resume_name}">Download Resume 📂</a>'
     return href
 
-# PDF Text Extraction
-def input_pdf_text(uploaded_file):
-    try:
-        reader = pdf.PdfReader(uploaded_file)
-        return "".join(page.extract_text() or "" for page in reader.pages)
-    except Exception as e:
-        st.error(f"Error reading PDF: {e}")
-        return ""
-
-# Gemini API Call
-def get_ats_evaluation(resume_text, job_desc):
-    prompt = f"""
-You are an intelligent ATS system evaluating candidates for tech roles.
-Compare the resume with the job description and return structured JSON with:
-
-- "JD Match": "XX%"
-- "MatchedKeywords": [{{"keyword": "Python", "reason": "Mentioned in experience section as a key skill"}}, ...]
-- "MissingKeywords": [{{"keyword": "Docker", "reason": "Not mentioned anywhere in the resume"}}, ...]
-- "Profile Summary": "Brief summary of strengths, tech stack, alignment with job."
-
-Resume:
-{resume_text}
-
-Job Description:
-{job_desc}
-"""
+# Numeric score from a stored match percent; None for "Pending"/"Failed" rows so they
+# stay out of rankings and charts instead of looking like 0% matches
+def parse_score(match_percent):
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        response = model.generate_content(prompt)
-        return response.text.strip()
-    except Exception as e:
-        return f"Error from Gemini API: {e}"
+        return int((match_percent or "").replace('%', '').strip())
+    except ValueError:
+        return None
+
+# Evaluation table (no resume blobs), cached per JD / sort combination; searches filter
+# the cached frame so free text doesn't add cache entries.
+# Writes from this app clear the cache; the TTL picks up portal submissions.
+@st.cache_data(ttl=60, max_entries=32, show_spinner=False)
+def load_evaluation_table(jd_id=None, sort_option="Most Recent"):
+    session = Session()
+    query = session.query(
+        EvaluationResult.id,
+        EvaluationResult.name,
+        EvaluationResult.email,
+        JobDescription.title,
+        EvaluationResult.match_percent,
+        EvaluationResult.summary,
+        EvaluationResult.resume_name,
+        EvaluationResult.created_at
+    ).join(JobDescription, EvaluationResult.job_description_id == JobDescription.id)
+    if jd_id is not None:
+        query = query.filter(EvaluationResult.job_description_id == jd_id)
+    rows = query.all()
+    session.close()
+
+    df = pd.DataFrame(rows, columns=["ID", "Name", "Email", "Job Description", "Match", "Summary", "Resume", "Evaluated"])
+    df["Name"] = df["Name"].fillna("N/A")
+    df["Email"] = df["Email"].fillna("N/A")
+    df["Summary"] = df["Summary"].fillna("")
+    df["Score"] = df["Match"].map(parse_score)
+    df["Evaluated"] = pd.to_datetime(df["Evaluated"]).dt.tz_localize("UTC").dt.tz_convert("Europe/London")
+
+    if sort_option == "Most Recent":
+        df = df.sort_values("Evaluated", ascending=False)
+    elif sort_option == "Highest Match":
+        df = df.sort_values("Score", ascending=False, kind="stable", na_position="last")
+    elif sort_option == "Lowest Match":
+        df = df.sort_values("Score", ascending=True, kind="stable", na_position="last")
+    return df.reset_index(drop=True)
+
+# Shared column config for evaluation tables
+EVALUATION_COLUMNS = {
+    "ID": None,
+    "Match": None,
+    "Score": st.column_config.ProgressColumn("Match Score", min_value=0, max_value=100, format="%d%%"),
+    "Summary": st.column_config.TextColumn("Summary", width="large"),
+    "Evaluated": st.column_config.DatetimeColumn("Evaluated", format="YYYY-MM-DD HH:mm"),
+}
+
+# Render a dataframe with single-row selection and return the selected evaluation id
+def select_evaluation(df, key, column_order):
+    event = st.dataframe(
+        df,
+        column_config=EVALUATION_COLUMNS,
+        column_order=column_order,
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key=key
+    )
+    if event.selection.rows:
+        return int(df.iloc[event.selection.rows[0]]["ID"])
+    return None
+
+# Detail card for one evaluation; the resume blob is only loaded here
+def show_evaluation_detail(evaluation_id):
+    session = Session()
+    row = session.get(EvaluationResult, evaluation_id, options=[joinedload(EvaluationResult.job_description_rel)])
+    if not row:
+        session.close()
+        st.info("This evaluation no longer exists.")
+        return
+    london_time = row.created_at.replace(tzinfo=datetime.timezone.utc).astimezone(pytz.timezone('Europe/London'))
+    file_size_kb = round(len(row.resume_file) / 1024, 2) if row.resume_file else 0
+    href = get_resume_download_link(row) if row.resume_file else ""
+    st.markdown(f"""
+        <div class="evaluation-field"><span class="evaluation-label">Candidate Name:</span> {row.name or 'N/A'}</div>
+        <div class="evaluation-field"><span class="evaluation-label">Email:</span> {row.email or 'N/A'}</div>
+        <div class="evaluation-field"><span class="evaluation-label">Resume:</span> {row.resume_name} ({file_size_kb} KB) {href}</div>
+        <div class="evaluation-field"><span class="evaluation-label">Job Description:</span> {row.job_description_rel.title}</div>
+        <div class="evaluation-field"><span class="evaluation-label">Evaluation Date:</span> {london_time.strftime('%Y-%m-%d %H:%M')}</div>
+        <div class="evaluation-field"><span class="evaluation-label">Match Score:</span> {row.match_percent}</div>
+        <div class="evaluation-field"><span class="evaluation-label">Summary:</span> {row.summary}</div>
+    """, unsafe_allow_html=True)
+    session.close()
+
+# Score distribution in fixed 10-point buckets so chart size doesn't grow with candidates
+def score_histogram(scores):
+    labels = [f"{lo}-{lo + 9}" for lo in range(0, 90, 10)] + ["90-100"]
+    buckets = (scores.dropna().clip(0, 100) // 10).clip(upper=9).astype(int)
+    counts = buckets.value_counts().reindex(range(10), fill_value=0)
+    counts.index = labels
+    return counts.rename("Candidates")
 
 # Sidebar Navigation
 view_option = st.sidebar.radio("Select the Service", ["🧠 Evaluate", "📋 Manage JDs", "📜 History", "📈 Candidate Ranking"])
@@ -227,6 +294,7 @@ if view_option == "📋 Manage JDs":
                     jd = JobDescription(title=new_title.strip(), description=new_desc.strip())
                     session.add(jd)
                     session.commit()
+                    load_evaluation_table.clear()
                     st.success(f"Added new Job Description: '{new_title.strip()}'")
                     st.rerun()
 
@@ -270,6 +338,7 @@ if view_option == "📋 Manage JDs":
                                 jd.title = updated_title.strip()
                                 jd.description = updated_desc.strip()
                                 session.commit()
+                                load_evaluation_table.clear()
                                 st.success(f"Updated Job Description '{updated_title.strip()}'")
                                 st.session_state[f"edit_mode_{jd.id}"] = False
                                 st.rerun()
@@ -286,6 +355,7 @@ if view_option == "📋 Manage JDs":
                     try:
                         session.delete(jd)  # This will cascade delete related evaluations if configured
                         session.commit()
+                        load_evaluation_table.clear()
                         st.success(f"Deleted Job Description '{jd.title}' and related evaluations.")
                         # Clean up session state and refresh UI
                         st.session_state.pop(f"confirm_del_{jd.id}", None)
@@ -323,170 +393,128 @@ elif view_option == "🧠 Evaluate":
             if not uploaded_file or not jd_text.strip() or not name.strip() or not email.strip():
                 st.warning("Please provide name, email, upload a resume and select a job description.")
             else:
-                resume_text = input_pdf_text(uploaded_file)
                 uploaded_file.seek(0)
                 resume_binary = uploaded_file.read()
 
-                session = Session()
-                duplicate = session.query(EvaluationResult).filter_by(
-                    resume_name=uploaded_file.name,
-                    job_description_id=jd_obj.id
-                ).first()
-
-                if duplicate:
-                    st.warning("⚠️ This resume has already been evaluated for the selected job description.")
-                else:
-                    with st.spinner("Analysing resume..."):
-                        raw_output = get_ats_evaluation(resume_text, jd_text)
-                        raw_output_clean = raw_output.replace("**", "").replace("```json", "").replace("```", "")
-                        try:
-                            raw_json = json.loads(raw_output_clean)
-                        except json.JSONDecodeError:
-                            st.error("⚠️ Failed to parse output. Showing raw response instead.")
-                            raw_json = {"response": raw_output_clean}
-
-                    score_str = raw_json.get("JD Match", "0%")
-                    matched = raw_json.get("MatchedKeywords", [])
-                    missing = raw_json.get("MissingKeywords", [])
-                    summary = raw_json.get("Profile Summary", "No summary generated.")
-
-                    session.add(EvaluationResult(
-                        name=name.strip(),
-                        email=email.strip(),
-                        resume_name=uploaded_file.name,
-                        resume_file=resume_binary,
-                        job_description_id=jd_obj.id,
-                        match_percent=score_str,
-                        summary=summary,
-                        matched_keywords=json.dumps(matched),
-                        missing_keywords=json.dumps(missing)
-                    ))
-                    session.commit()
-                    session.close()
-
-                    st.success("✅ Evaluation saved successfully.")
-
-                    tab1, tab2 = st.tabs(["📊 Result", "📄 Detailed View"])
-
-                    with tab1:
-                        st.subheader("📈 Match Score")
-                        score = int(score_str.replace("%", "")) if "%" in score_str else 0
-                        st.markdown(f"""
-                            <div style='background-color: #28a745; color: white; font-size: 24px;
-                                padding: 8px 16px; display: inline-block; border-radius: 6px; margin-bottom: 10px;'>
-                                Match Score: {score}%
-                            </div>
-                        """, unsafe_allow_html=True)
-                        st.progress(score)
-
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.subheader("✅ Matched Keywords")
-                            if isinstance(matched, list) and matched:
-                                for item in matched:
-                                    st.markdown(f"<span class='highlight'>{item.get('keyword', '')}</span>", unsafe_allow_html=True)
-                            else:
-                                st.write("No specific keywords matched.")
-
-                        with col2:
-                            st.subheader("❌ Missing Keywords")
-                            if isinstance(missing, list) and missing:
-                                for item in missing:
-                                    st.markdown(f"<span class='highlight'>{item.get('keyword', '')}</span>", unsafe_allow_html=True)
-                            else:
-                                st.write("No major keywords missing. ✅")
-
-                        st.subheader("🧾 Profile Summary")
-                        st.write(summary)
-                        st.download_button("⬇️ Download Summary", data=summary, file_name="profile_summary.txt")
-
-                    with tab2:
-                        st.subheader("📄 Detailed Output")
+                # The worker service parses, evaluates and saves the result
+                with st.spinner("Analysing resume..."):
+                    try:
+                        outcome = submit_evaluation(name.strip(), email.strip(), jd_obj.id, uploaded_file.name, resume_binary)
+                    except WorkerError as e:
+                        st.error(f"⚠️ Evaluation failed: {e}")
+                        st.stop()
+                load_evaluation_table.clear()
+
+                if outcome["status"] == "duplicate":
+                    if outcome.get("pending"):
+                        st.info("⏳ This resume is already queued for evaluation against the selected job description.")
+                    else:
+                        st.warning("⚠️ This resume has already been evaluated for the selected job description.")
+                    st.stop()
+                if outcome["status"] == "pending":
+                    st.info("⏳ Gemini is currently unavailable. The evaluation has been queued and will appear in History once complete.")
+                    st.stop()
+
+                raw_json = outcome["result"]
+                score_str = raw_json.get("JD Match", "0%")
+                matched = raw_json.get("MatchedKeywords", [])
+                missing = raw_json.get("MissingKeywords", [])
+                summary = raw_json.get("Profile Summary", "No summary generated.")
+
+                st.success("✅ Evaluation saved successfully.")
+
+                tab1, tab2 = st.tabs(["📊 Result", "📄 Detailed View"])
+
+                with tab1:
+                    st.subheader("📈 Match Score")
+                    score = int(score_str.replace("%", "")) if "%" in score_str else 0
+                    st.markdown(f"""
+                        <div style='background-color: #28a745; color: white; font-size: 24px;
+                            padding: 8px 16px; display: inline-block; border-radius: 6px; margin-bottom: 10px;'>
+                            Match Score: {score}%
+                        </div>
+                    """, unsafe_allow_html=True)
+                    st.progress(score)
 
+                    col1, col2 = st.columns(2)
+                    with col1:
                         st.subheader("✅ Matched Keywords")
-                        if isinstance(matched, list):
+                        if isinstance(matched, list) and matched:
                             for item in matched:
-                                st.markdown(f"<span class='highlight'>{item['keyword']}</span>: {item['reason']}", unsafe_allow_html=True)
+                                st.markdown(f"<span class='highlight'>{item.get('keyword', '')}</span>", unsafe_allow_html=True)
                         else:
-                            st.write("No matched keywords.")
+                            st.write("No specific keywords matched.")
 
+                    with col2:
                         st.subheader("❌ Missing Keywords")
-                        if isinstance(missing, list):
+                        if isinstance(missing, list) and missing:
                             for item in missing:
-                                st.markdown(f"<span class='highlight'>{item['keyword']}</span>: {item['reason']}", unsafe_allow_html=True)
+                                st.markdown(f"<span class='highlight'>{item.get('keyword', '')}</span>", unsafe_allow_html=True)
                         else:
-                            st.write("No missing keywords.")
+                            st.write("No major keywords missing. ✅")
+
+                    st.subheader("🧾 Profile Summary")
+                    st.write(summary)
+                    st.download_button("⬇️ Download Summary", data=summary, file_name="profile_summary.txt")
+
+                with tab2:
+                    st.subheader("📄 Detailed Output")
+
+                    st.subheader("✅ Matched Keywords")
+                    if isinstance(matched, list):
+                        for item in matched:
+                            st.markdown(f"<span class='highlight'>{item['keyword']}</span>: {item['reason']}", unsafe_allow_html=True)
+                    else:
+                        st.write("No matched keywords.")
 
-                        st.subheader("🧾 Profile Summary")
-                        st.write(summary)
+                    st.subheader("❌ Missing Keywords")
+                    if isinstance(missing, list):
+                        for item in missing:
+                            st.markdown(f"<span class='highlight'>{item['keyword']}</span>: {item['reason']}", unsafe_allow_html=True)
+                    else:
+                        st.write("No missing keywords.")
 
-# History View with expandable cards
+                    st.subheader("🧾 Profile Summary")
+                    st.write(summary)
+
+# History View with a virtualized table and on-demand detail
 elif view_option == "📜 History":
     st.markdown("<h2 class='main-header'>📜 Previous Evaluations</h2>", unsafe_allow_html=True)
     session = Session()
     jds = session.query(JobDescription).order_by(JobDescription.created_at.desc()).all()
+    session.close()
 
     if not jds:
         st.info("No job descriptions found. Please add some in 'Manage JDs' tab.")
-        session.close()
     else:
         jd_titles = [jd.title for jd in jds]
         selected_title = st.selectbox("Filter by Job Description", ["All"] + jd_titles)
-
-        if selected_title == "All":
-            evaluations = session.query(EvaluationResult).options(joinedload(EvaluationResult.job_description_rel)).order_by(EvaluationResult.created_at.desc()).all()
-        else:
-            jd_obj = next((jd for jd in jds if jd.title == selected_title), None)
-            if jd_obj:
-                evaluations = session.query(EvaluationResult).options(joinedload(EvaluationResult.job_description_rel))\
-                    .filter_by(job_description_id=jd_obj.id).order_by(EvaluationResult.created_at.desc()).all()
-            else:
-                evaluations = []
-
-        session.close()
+        jd_obj = next((jd for jd in jds if jd.title == selected_title), None)
 
         sort_option = st.selectbox("Sort by", ["Most Recent", "Highest Match", "Lowest Match"])
         search_text = st.text_input("🔍 Search Summary Keywords")
 
-        if sort_option == "Most Recent":
-            evaluations.sort(key=lambda r: r.created_at, reverse=True)
-        elif sort_option == "Highest Match":
-            evaluations.sort(key=lambda r: int(r.match_percent.replace('%', '').strip()) if r.match_percent else 0, reverse=True)
-        elif sort_option == "Lowest Match":
-            evaluations.sort(key=lambda r: int(r.match_percent.replace('%', '').strip()) if r.match_percent else 0)
-
+        df = load_evaluation_table(jd_obj.id if jd_obj else None, sort_option)
         if search_text:
-            evaluations = [row for row in evaluations if search_text.lower() in (row.summary or "").lower()]
-
-        if evaluations:
-            for row in evaluations:
-                london_time = row.created_at.replace(tzinfo=datetime.timezone.utc).astimezone(pytz.timezone('Europe/London'))
-                resume_b64 = base64.b64encode(row.resume_file).decode('utf-8')
-                href = f'<a href="data:application/pdf;base64,{resume_b64}" download="{row.resume_name}">📂 Download Resume</a>'
-                file_size_kb = round(len(row.resume_file) / 1024, 2)
-
-                expander_label = (
-                    f"{row.name or 'N/A'} | {row.email or 'N/A'} | JD: {row.job_description_rel.title} | "
-                    f"Score: {row.match_percent} | {london_time.strftime('%Y-%m-%d %H:%M')}"
-                )
+            df = df[df["Summary"].str.contains(search_text, case=False, regex=False)].reset_index(drop=True)
 
-                with st.expander(expander_label, expanded=False):
-                    st.markdown(f"""
-                        <div class="evaluation-field"><span class="evaluation-label">Candidate Name:</span> {row.name or 'N/A'}</div>
-                        <div class="evaluation-field"><span class="evaluation-label">Email:</span> {row.email or 'N/A'}</div>
-                        <div class="evaluation-field"><span class="evaluation-label">Resume:</span> {row.resume_name} ({file_size_kb} KB) {href}</div>
-                        <div class="evaluation-field"><span class="evaluation-label">Job Description:</span> {row.job_description_rel.title}</div>
-                        <div class="evaluation-field"><span class="evaluation-label">Evaluation Date:</span> {london_time.strftime('%Y-%m-%d %H:%M')}</div>
-                        <div class="evaluation-field"><span class="evaluation-label">Match Score:</span> {row.match_percent}</div>
-                        <div class="evaluation-field"><span class="evaluation-label">Summary:</span> {row.summary}</div>
-                    """, unsafe_allow_html=True)
-        else:
+        if df.empty:
             st.info("No evaluations found for this filter.")
+        else:
+            st.caption(f"{len(df)} evaluations — select a row to view details.")
+            selected_id = select_evaluation(
+                df, "history_table",
+                ["Name", "Email", "Job Description", "Score", "Evaluated", "Resume", "Summary"]
+            )
+            if selected_id is not None:
+                st.markdown("---")
+                show_evaluation_detail(selected_id)
 
 elif view_option == "📈 Candidate Ranking":
     st.markdown("<h2 class='main-header'>📈 Candidate Ranking by Job Description</h2>", unsafe_allow_html=True)
     session = Session()
     jds = session.query(JobDescription).order_by(JobDescription.created_at.desc()).all()
+    session.close()
 
     if not jds:
         st.info("No job descriptions found.")
@@ -496,54 +524,30 @@ elif view_option == "📈 Candidate Ranking":
         jd_obj = next((jd for jd in jds if jd.title == selected_title), None)
 
         if jd_obj:
-            evaluations = sorted(
-                jd_obj.evaluations,
-                key=lambda x: int(x.match_percent.replace('%', '').strip()) if x.match_percent else 0,
-                reverse=True
-            )
+            df = load_evaluation_table(jd_obj.id, "Highest Match")
 
-            if not evaluations:
+            if df.empty:
                 st.info("No evaluations found for the selected job description.")
             else:
-                # Prepare data for display and plot
-                data = []
-                for rank, e in enumerate(evaluations, start=1):
-                    data.append({
-                        "Rank": rank,
-                        "Name": e.name or "N/A",
-                        "Email": e.email or "N/A",
-                        "MatchPercent": int(e.match_percent.replace('%', '').strip()) if e.match_percent else 0,
-                        "Summary": e.summary or "",
-                        "ResumeLink": get_resume_download_link(e)
-                    })
-
-                df = pd.DataFrame(data)
-
-                # Plot bar chart for match percentages
-                st.subheader(f"📊 Match Percentage Distribution for '{selected_title}'")
-                st.bar_chart(df.set_index("Name")["MatchPercent"])
+                # Only scored candidates are ranked; Pending/Failed rows sort last without a rank
+                scored = df["Score"].notna()
+                df.insert(0, "Rank", scored.cumsum().where(scored).astype("Int64"))
 
-                # Custom CSS for candidate cards and expander headers
-                st.markdown("""
-                    <style>
-                        
-                    </style>
-                """, unsafe_allow_html=True)
+                # Score distribution, bucketed so render cost stays flat
+                st.subheader(f"📊 Match Percentage Distribution for '{selected_title}'")
+                st.bar_chart(score_histogram(df["Score"]))
+                unscored = int((~scored).sum())
+                if unscored:
+                    st.caption(f"{unscored} candidates with a pending or failed evaluation are not charted or ranked.")
 
                 st.write(f"### Candidate Rankings for '{selected_title}':")
-                
-                for row in data:
-                    expander_label = f"🏅 Rank #{row['Rank']} — 👤 {row['Name']} — ✉️ {row['Email']} — ⭐ {row['MatchPercent']}%"
-                    with st.expander(expander_label, expanded=False):
-                        st.markdown(f"""
-                            <div class="candidate-field"><span class="candidate-label">Name:</span> {row['Name']}</div>
-                            <div class="candidate-field"><span class="candidate-label">Email:</span> {row['Email']}</div>
-                            <div class="candidate-field"><span class="candidate-label">Match Score:</span> {row['MatchPercent']}%</div>
-                            <div class="candidate-field"><span class="candidate-label">Summary:</span> {row['Summary']}</div>
-                            <div class="candidate-field">{row['ResumeLink']}</div>
-                        """, unsafe_allow_html=True)
-
-                export_df = df.drop(columns=["ResumeLink"])
-                st.download_button("📥 Export Ranked Candidates as CSV", export_df.to_csv(index=False), "ranked_candidates.csv")
+                selected_id = select_evaluation(
+                    df, "ranking_table",
+                    ["Rank", "Name", "Email", "Score", "Summary"]
+                )
+                if selected_id is not None:
+                    st.markdown("---")
+                    show_evaluation_detail(selected_id)
 
-    session.close()
+                export_df = df[["Rank", "Name", "Email", "Score", "Summary"]].rename(columns={"Score": "MatchPercent"})
+                st.download_button("📥 Export Ranked Candidates as CSV", export_df.to_csv(index=False), "ranked_candidates.csv")
@@ -1,91 +1,23 @@
 from flask import Flask, request, jsonify, render_template
 from flask_cors import CORS
 import os
-import json
 import sqlite3
 import requests
 from dotenv import load_dotenv
-import google.generativeai as genai
-from io import BytesIO
-import PyPDF2
 from werkzeug.utils import secure_filename
+from evaluation import create_tables, DB_PATH
+from worker_client import submit_evaluation, check_submission, WorkerError
 
 # Load environment variables
 load_dotenv()
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 ZAPIER_WEBHOOK_URL = os.getenv("ZAPIER_WEBHOOK_URL")
 
-if not GOOGLE_API_KEY:
-    raise Exception("GOOGLE_API_KEY is not set")
-
-genai.configure(api_key=GOOGLE_API_KEY)
-
 # Setup Flask
 app = Flask(__name__)
 CORS(app)
 
-# DB Path
-BASE_DIR = os.path.abspath(os.path.dirname(__file__))
-DB_PATH = os.path.join(BASE_DIR, "ats_results.db")
-
-# Create tables if they don't exist
-def create_tables():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # Job Descriptions table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS job_descriptions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT UNIQUE NOT NULL,
-            description TEXT NOT NULL,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-
-    # Results table with PDF stored as blob
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS results (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT NOT NULL,
-            job_description_id INTEGER NOT NULL,
-            resume_name TEXT,
-            resume_file BLOB,
-            match_percent TEXT,
-            summary TEXT,
-            matched_keywords TEXT,
-            missing_keywords TEXT,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(job_description_id) REFERENCES job_descriptions(id)
-        )
-    ''')
-
-    conn.commit()
-    conn.close()
-
 create_tables()
 
-# Gemini Evaluation Logic
-def evaluate_resume_with_gemini(resume_text, jd_text):
-    prompt = f"""
-You are an intelligent ATS system evaluating candidates for tech roles.
-Compare the resume with the job description and return structured JSON with:
-- "JD Match": "XX%"
-- "MatchedKeywords": [{{"keyword": "Python", "reason": "..."}}, ...]
-- "MissingKeywords": [{{"keyword": "Docker", "reason": "..."}}, ...]
-- "Profile Summary": "..."
-Resume:
-{resume_text}
-
-Job Description:
-{jd_text}
-"""
-    model = genai.GenerativeModel('gemini-2.0-flash')
-    response = model.generate_content(prompt)
-    clean_output = response.text.strip().replace("**", "").replace("```json", "").replace("```", "")
-    return json.loads(clean_output)
-
 # Home Route
 @app.route("/", methods=["GET"])
 def index():
@@ -127,42 +59,24 @@ def submit_form():
         if not file or not file.filename.endswith(".pdf"):
             return jsonify({"error": "Invalid file type (PDF required)"}), 400
 
+        # Throttle before doing any PDF or LLM work; counters are shared in the worker
+        retry_after = check_submission(email, request.remote_addr, job_description_id)
+        if retry_after:
+            return jsonify({"error": "Too many submissions, please try again later"}), 429, {"Retry-After": str(retry_after)}
+
         resume_binary = file.read()
         filename = secure_filename(file.filename)
 
-        # Fetch job description text
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT description FROM job_descriptions WHERE id=?", (job_description_id,))
-        jd_row = cursor.fetchone()
-
-        if not jd_row:
-            return jsonify({"error": "Invalid job description ID"}), 400
-
-        jd_text = jd_row[0]
-
-        # Extract resume text
-        reader = PyPDF2.PdfReader(BytesIO(resume_binary))
-        resume_text = " ".join(page.extract_text() or "" for page in reader.pages)
-
-        # Get evaluation
-        ats_result = evaluate_resume_with_gemini(resume_text, jd_text)
-
-        # Save result to DB
-        cursor.execute('''
-            INSERT INTO results
-            (name, email, job_description_id, resume_name, resume_file, match_percent, summary, matched_keywords, missing_keywords)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            name, email, job_description_id, filename, resume_binary,
-            ats_result.get("JD Match", "0%"),
-            ats_result.get("Profile Summary", "N/A"),
-            json.dumps(ats_result.get("MatchedKeywords", [])),
-            json.dumps(ats_result.get("MissingKeywords", []))
-        ))
-
-        conn.commit()
-        conn.close()
+        # Evaluation, dedup and storage happen in the worker service
+        try:
+            outcome = submit_evaluation(name, email, job_description_id, filename, resume_binary)
+        except WorkerError as worker_error:
+            headers = {"Retry-After": worker_error.retry_after} if worker_error.retry_after else {}
+            return jsonify({"error": str(worker_error)}), worker_error.status_code, headers
+
+        # Identical resume already submitted for this JD: nothing new to notify
+        if outcome["status"] == "duplicate":
+            return render_template("thankyou.html")
 
         # Notify Zapier (optional)
         if ZAPIER_WEBHOOK_URL:
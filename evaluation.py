@@ -0,0 +1,197 @@
+import os
+import json
+import sqlite3
+from io import BytesIO
+import PyPDF2
+from dotenv import load_dotenv
+
+# Evaluation logic shared by the worker service and the front ends:
+# schema, prompt, Gemini output parsing, PDF extraction and the results write path.
+
+load_dotenv()
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+DB_PATH = os.getenv("ATS_DB_PATH", os.path.join(BASE_DIR, "ats_results.db"))
+
+
+# Create tables if they don't exist
+def create_tables():
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    # WAL lets the front ends keep reading while the worker writes
+    cursor.execute("PRAGMA journal_mode=WAL")
+
+    # Job Descriptions table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS job_descriptions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT UNIQUE NOT NULL,
+            description TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Results table with PDF stored as blob
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            job_description_id INTEGER NOT NULL,
+            resume_name TEXT,
+            resume_file BLOB,
+            match_percent TEXT,
+            summary TEXT,
+            matched_keywords TEXT,
+            missing_keywords TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(job_description_id) REFERENCES job_descriptions(id)
+        )
+    ''')
+
+    # Content hash of the uploaded PDF, added after the original schema.
+    # Every process runs this at startup, so check and alter under one write lock.
+    cursor.execute("BEGIN IMMEDIATE")
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(results)")]
+    if "resume_sha256" not in columns:
+        cursor.execute("ALTER TABLE results ADD COLUMN resume_sha256 TEXT")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_results_sha256_jd ON results (resume_sha256, job_description_id)")
+    conn.commit()
+    conn.close()
+
+
+# Gemini prompt
+def build_prompt(resume_text, jd_text):
+    return f"""
+You are an intelligent ATS system evaluating candidates for tech roles.
+Compare the resume with the job description and return structured JSON with:
+
+- "JD Match": "XX%"
+- "MatchedKeywords": [{{"keyword": "Python", "reason": "Mentioned in experience section as a key skill"}}, ...]
+- "MissingKeywords": [{{"keyword": "Docker", "reason": "Not mentioned anywhere in the resume"}}, ...]
+- "Profile Summary": "Brief summary of strengths, tech stack, alignment with job."
+
+Resume:
+{resume_text}
+
+Job Description:
+{jd_text}
+"""
+
+
+def parse_evaluation(text):
+    clean_output = text.strip().replace("**", "").replace("```json", "").replace("```", "")
+    return json.loads(clean_output)
+
+
+# PDF Text Extraction (runs in the worker's process pool)
+def extract_resume_text(resume_binary):
+    reader = PyPDF2.PdfReader(BytesIO(resume_binary))
+    return " ".join(page.extract_text() or "" for page in reader.pages)
+
+
+# --- DB access ---
+def get_job_description(job_description_id):
+    conn = sqlite3.connect(DB_PATH)
+    row = conn.execute("SELECT description FROM job_descriptions WHERE id=?", (job_description_id,)).fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+# Earlier submission of the same resume for a JD as (id, match_percent); Failed rows don't count
+def find_result_by_hash(resume_sha256, job_description_id):
+    conn = sqlite3.connect(DB_PATH)
+    row = conn.execute(
+        "SELECT id, match_percent FROM results WHERE resume_sha256=? AND job_description_id=? "
+        "AND COALESCE(match_percent, '') != 'Failed' ORDER BY id LIMIT 1",
+        (resume_sha256, job_description_id)
+    ).fetchone()
+    conn.close()
+    return row
+
+
+# Drop earlier Failed attempts once a resubmission has been stored
+def delete_failed_results(resume_sha256, job_description_id, keep_id):
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute(
+        "DELETE FROM results WHERE resume_sha256=? AND job_description_id=? AND match_percent='Failed' AND id != ?",
+        (resume_sha256, job_description_id, keep_id)
+    )
+    conn.commit()
+    conn.close()
+
+
+def save_result(name, email, job_description_id, resume_name, resume_binary, resume_sha256, ats_result):
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO results
+        (name, email, job_description_id, resume_name, resume_file, resume_sha256, match_percent, summary, matched_keywords, missing_keywords)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        name, email, job_description_id, resume_name, resume_binary, resume_sha256,
+        ats_result.get("JD Match", "0%"),
+        ats_result.get("Profile Summary", "N/A"),
+        json.dumps(ats_result.get("MatchedKeywords", [])),
+        json.dumps(ats_result.get("MissingKeywords", []))
+    ))
+    result_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+    return result_id
+
+
+# Fill in a result row that was saved while the LLM was unavailable
+def complete_pending_result(result_id, text):
+    ats_result = parse_evaluation(text)
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute('''
+        UPDATE results SET match_percent=?, summary=?, matched_keywords=?, missing_keywords=?
+        WHERE id=?
+    ''', (
+        ats_result.get("JD Match", "0%"),
+        ats_result.get("Profile Summary", "N/A"),
+        json.dumps(ats_result.get("MatchedKeywords", [])),
+        json.dumps(ats_result.get("MissingKeywords", [])),
+        result_id
+    ))
+    conn.commit()
+    conn.close()
+
+
+# Mark a queued evaluation that could not be completed so it stops showing as Pending
+def fail_pending_result(result_id, reason):
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute(
+        "UPDATE results SET match_percent='Failed', summary=? WHERE id=? AND match_percent='Pending'",
+        (f"Evaluation failed: {reason}", result_id)
+    )
+    conn.commit()
+    conn.close()
+
+
+# Pending rows are the durable evaluation queue; the worker resumes them on startup
+def pending_result_ids():
+    conn = sqlite3.connect(DB_PATH)
+    rows = conn.execute("SELECT id FROM results WHERE match_percent='Pending' ORDER BY id").fetchall()
+    conn.close()
+    return [row[0] for row in rows]
+
+
+def get_pending_result(result_id):
+    conn = sqlite3.connect(DB_PATH)
+    row = conn.execute('''
+        SELECT r.resume_file, j.description FROM results r
+        LEFT JOIN job_descriptions j ON j.id = r.job_description_id
+        WHERE r.id=? AND r.match_percent='Pending'
+    ''', (result_id,)).fetchone()
+    conn.close()
+    return row
+
+
+def delete_result(result_id):
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("DELETE FROM results WHERE id=?", (result_id,))
+    conn.commit()
+    conn.close()
@@ -0,0 +1,338 @@
+import os
+import time
+import random
+import threading
+import logging
+from collections import deque
+from dotenv import load_dotenv
+
+# Shared LLM client used by both the Flask portal and the Streamlit admin.
+# One model instance per process, an adaptive token bucket that slows down
+# when Gemini answers with 429, per-request deadlines, jittered retries and
+# a circuit breaker that parks work in a pending queue while Gemini is down.
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RATE_PER_SEC = float(os.getenv("LLM_RATE_PER_SEC", "2"))
+LLM_BURST = int(os.getenv("LLM_BURST", "5"))
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+LLM_QUEUE_SIZE = int(os.getenv("LLM_QUEUE_SIZE", "500"))
+LLM_DRAIN_ATTEMPTS = int(os.getenv("LLM_DRAIN_ATTEMPTS", "3"))
+
+
+# --- Errors ---
+class LLMError(Exception):
+    pass
+
+
+class RateLimitedError(LLMError):
+    """Backend rejected the call for quota reasons (HTTP 429)."""
+
+
+class TransientLLMError(LLMError):
+    """Timeouts, 5xx and connection errors that are worth retrying."""
+
+
+class LLMUnavailableError(LLMError):
+    """Raised when the circuit is open or the deadline ran out."""
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """Raised without calling the backend because the circuit is open."""
+
+
+# --- Backends ---
+class GeminiBackend:
+    def __init__(self, model_name=GEMINI_MODEL, api_key=None):
+        import google.generativeai as genai
+        from google.api_core import exceptions as gexc
+
+        api_key = api_key or os.getenv("GOOGLE_API_KEY")
+        if api_key:
+            genai.configure(api_key=api_key)
+        self._gexc = gexc
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt, timeout):
+        gexc = self._gexc
+        try:
+            response = self.model.generate_content(prompt, request_options={"timeout": timeout})
+        # TooManyRequests is the HTTP 429 base class; ResourceExhausted is its gRPC subclass
+        except gexc.TooManyRequests as e:
+            raise RateLimitedError(str(e)) from e
+        except (gexc.DeadlineExceeded, gexc.ServiceUnavailable, gexc.InternalServerError,
+                TimeoutError, ConnectionError) as e:
+            raise TransientLLMError(str(e)) from e
+        return response.text
+
+
+class FakeBackend:
+    """In-process stand-in for Gemini, selected with LLM_BACKEND=fake.
+
+    `script` is a list of strings or exception instances consumed in order;
+    once it is exhausted every call returns `default`.
+    """
+
+    DEFAULT_RESPONSE = (
+        '{"JD Match": "50%", "MatchedKeywords": [], "MissingKeywords": [], '
+        '"Profile Summary": "Fake evaluation."}'
+    )
+
+    def __init__(self, script=None, default=DEFAULT_RESPONSE, latency=0.0):
+        self.script = deque(script or [])
+        self.default = default
+        self.latency = latency
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, timeout):
+        with self._lock:
+            self.calls.append(prompt)
+            step = self.script.popleft() if self.script else self.default
+        if self.latency:
+            if self.latency > timeout:
+                time.sleep(timeout)
+                raise TransientLLMError("fake backend timed out")
+            time.sleep(self.latency)
+        if isinstance(step, BaseException):
+            raise step
+        return step
+
+
+# --- Rate limiting ---
+class AdaptiveTokenBucket:
+    """Token bucket whose refill rate halves on 429 and creeps back on success."""
+
+    def __init__(self, rate=LLM_RATE_PER_SEC, capacity=LLM_BURST, min_rate=0.1, increase=0.1):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, deadline):
+        """Block until a token is available; return False if the deadline passes first."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+
+
+# --- Circuit breaker ---
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, threshold=LLM_BREAKER_THRESHOLD, reset_after=LLM_BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_after:
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def cancel_trial(self):
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                if self.state != self.OPEN:
+                    logger.warning("LLM circuit opened after %d failures", self.failures)
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._trial_running = False
+
+
+# --- Client ---
+class LLMClient:
+    def __init__(self, backend, limiter=None, breaker=None, timeout=LLM_TIMEOUT,
+                 deadline=LLM_DEADLINE, max_retries=LLM_MAX_RETRIES, queue_size=LLM_QUEUE_SIZE,
+                 drain_attempts=LLM_DRAIN_ATTEMPTS):
+        self.backend = backend
+        self.limiter = limiter or AdaptiveTokenBucket()
+        self.breaker = breaker or CircuitBreaker()
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.queue_size = queue_size
+        self.drain_attempts = drain_attempts
+        self.pending = deque()
+        self._drainer = None
+        self._lock = threading.Lock()
+
+    @property
+    def degraded(self):
+        return self.breaker.state != CircuitBreaker.CLOSED
+
+    def generate(self, prompt, deadline=None):
+        """Return the model's text for `prompt` or raise LLMUnavailableError."""
+        end = time.monotonic() + (deadline or self.deadline)
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError("LLM circuit is open")
+            if not self.limiter.acquire(end):
+                self.breaker.cancel_trial()
+                raise LLMUnavailableError("LLM deadline exceeded waiting for rate limit")
+            remaining = end - time.monotonic()
+            try:
+                text = self.backend.generate(prompt, timeout=min(self.timeout, remaining))
+            except RateLimitedError as e:
+                self.limiter.on_throttle()
+                self.breaker.record_failure()
+                error = e
+            except TransientLLMError as e:
+                self.breaker.record_failure()
+                error = e
+            except Exception:
+                self.breaker.cancel_trial()
+                raise
+            else:
+                self.limiter.on_success()
+                self.breaker.record_success()
+                return text
+
+            attempt += 1
+            if attempt > self.max_retries:
+                raise LLMUnavailableError(f"LLM call failed after {attempt} attempts: {error}")
+            # Full jitter exponential backoff, capped by the remaining deadline
+            backoff = random.uniform(0, min(10.0, 0.5 * (2 ** attempt)))
+            if time.monotonic() + backoff >= end:
+                raise LLMUnavailableError(f"LLM deadline exceeded: {error}")
+            time.sleep(backoff)
+
+    def enqueue(self, prompt, on_result, on_error=None):
+        """Park `prompt` until the LLM recovers; callbacks run on the drain thread."""
+        with self._lock:
+            if len(self.pending) >= self.queue_size:
+                raise LLMUnavailableError("LLM is degraded and the pending queue is full")
+            self.pending.append((prompt, on_result, on_error))
+            if self._drainer is None:
+                self._drainer = threading.Thread(target=self._drain, name="llm-drain", daemon=True)
+                self._drainer.start()
+
+    def _drain(self):
+        # Only this thread removes entries, so the head stays put until it is settled
+        attempts = 0
+        while True:
+            with self._lock:
+                if not self.pending:
+                    self._drainer = None
+                    return
+                prompt, on_result, on_error = self.pending[0]
+            try:
+                text = self.generate(prompt)
+            except CircuitOpenError:
+                time.sleep(min(self.breaker.reset_after, 5.0))
+                continue
+            except LLMUnavailableError as e:
+                # A prompt that keeps failing once it reaches Gemini would otherwise block the queue
+                attempts += 1
+                if attempts >= self.drain_attempts:
+                    self._settle(on_error, e, "Pending LLM request gave up")
+                    attempts = 0
+                else:
+                    time.sleep(min(self.breaker.reset_after, 5.0))
+                continue
+            except Exception as e:
+                self._settle(on_error, e, "Pending LLM request failed")
+                attempts = 0
+                continue
+            self._settle(on_result, text, "Pending LLM callback failed", on_error)
+            attempts = 0
+
+    def _settle(self, callback, value, message, on_error=None):
+        with self._lock:
+            self.pending.popleft()
+        if callback is None:
+            logger.error(message)
+            return
+        try:
+            callback(value)
+        except Exception as e:
+            logger.exception(message)
+            if on_error:
+                try:
+                    on_error(e)
+                except Exception:
+                    logger.exception("Pending LLM error callback failed")
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def make_backend(name=LLM_BACKEND):
+    if name == "fake":
+        return FakeBackend()
+    if name == "gemini":
+        return GeminiBackend()
+    raise ValueError(f"Unknown LLM backend: {name}")
+
+
+def get_client():
+    """Process-wide LLMClient, built on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient(make_backend())
+        return _client
+
+
+def set_client(client):
+    """Swap the process-wide client, e.g. for one wrapping a FakeBackend in tests."""
+    global _client
+    with _client_lock:
+        _client = client
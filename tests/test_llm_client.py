@@ -0,0 +1,190 @@
+import time
+import pytest
+import llm_client
+from llm_client import (
+    LLMClient, FakeBackend, AdaptiveTokenBucket, CircuitBreaker,
+    RateLimitedError, TransientLLMError, LLMUnavailableError
+)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(llm_client.random, "uniform", lambda a, b: 0)
+
+
+def make_client(script=None, threshold=5, reset_after=30, **kwargs):
+    backend = FakeBackend(script=script)
+    client = LLMClient(
+        backend,
+        limiter=AdaptiveTokenBucket(rate=100, capacity=100),
+        breaker=CircuitBreaker(threshold=threshold, reset_after=reset_after),
+        **kwargs
+    )
+    return client, backend
+
+
+def wait_for(condition, timeout=2.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+# --- Token bucket ---
+def test_bucket_throttle_halves_rate_and_success_recovers():
+    bucket = AdaptiveTokenBucket(rate=2, capacity=1, increase=0.5)
+    bucket.on_throttle()
+    assert bucket.rate == 1
+    bucket.on_success()
+    bucket.on_success()
+    assert bucket.rate == 2
+
+
+def test_bucket_gives_up_at_deadline():
+    bucket = AdaptiveTokenBucket(rate=0.1, capacity=1)
+    assert bucket.acquire(time.monotonic() + 1)
+    assert not bucket.acquire(time.monotonic() + 0.05)
+
+
+# --- Circuit breaker ---
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(threshold=2, reset_after=60)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_breaker_half_open_allows_one_trial():
+    breaker = CircuitBreaker(threshold=1, reset_after=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.cancel_trial()
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_failed_trial_reopens():
+    breaker = CircuitBreaker(threshold=1, reset_after=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+# --- Client ---
+def test_generate_returns_backend_text():
+    client, backend = make_client(script=["ok"])
+    assert client.generate("prompt") == "ok"
+    assert backend.calls == ["prompt"]
+
+
+def test_rate_limit_backs_off_and_retries():
+    client, backend = make_client(script=[RateLimitedError("429"), "ok"])
+    assert client.generate("prompt") == "ok"
+    assert len(backend.calls) == 2
+    assert client.limiter.rate < client.limiter.max_rate
+
+
+def test_retries_exhausted_raise_unavailable():
+    client, backend = make_client(script=[TransientLLMError("5xx")] * 3, max_retries=2)
+    with pytest.raises(LLMUnavailableError):
+        client.generate("prompt")
+    assert len(backend.calls) == 3
+
+
+def test_backend_timeout_is_retried():
+    client, backend = make_client(timeout=0.01)
+    backend.latency = 0.05
+    with pytest.raises(LLMUnavailableError):
+        client.generate("prompt", deadline=0.2)
+    assert len(backend.calls) >= 1
+
+
+def test_open_circuit_rejects_without_calling_backend():
+    client, backend = make_client(script=[TransientLLMError("down")] * 2, threshold=2, max_retries=5)
+    with pytest.raises(LLMUnavailableError):
+        client.generate("prompt")
+    calls = len(backend.calls)
+    with pytest.raises(LLMUnavailableError):
+        client.generate("prompt")
+    assert len(backend.calls) == calls
+    assert client.degraded
+
+
+def test_unexpected_error_releases_half_open_trial():
+    client, backend = make_client(script=[ValueError("bad request")], threshold=1, reset_after=0.01)
+    client.breaker.record_failure()
+    time.sleep(0.02)
+    with pytest.raises(ValueError):
+        client.generate("prompt")
+    assert client.generate("prompt") == FakeBackend.DEFAULT_RESPONSE
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_rate_limit_deadline_releases_half_open_trial():
+    client, backend = make_client(threshold=1, reset_after=0.01)
+    client.limiter = AdaptiveTokenBucket(rate=0.1, capacity=1)
+    client.limiter.tokens = 0
+    client.breaker.record_failure()
+    time.sleep(0.02)
+    with pytest.raises(LLMUnavailableError):
+        client.generate("prompt", deadline=0.05)
+    assert client.breaker.allow()
+
+
+# --- Pending queue ---
+def test_enqueued_prompt_runs_after_recovery():
+    client, backend = make_client(script=[TransientLLMError("down")], threshold=1, reset_after=0.05)
+    client.breaker.record_failure()
+    results = []
+    client.enqueue("prompt", results.append)
+    assert wait_for(lambda: results)
+    assert results == [FakeBackend.DEFAULT_RESPONSE]
+    assert not client.pending
+
+
+def test_enqueue_rejects_when_full():
+    client, backend = make_client(threshold=1, reset_after=60, queue_size=2)
+    client.breaker.record_failure()
+    client.enqueue("a", lambda text: None)
+    client.enqueue("b", lambda text: None)
+    with pytest.raises(LLMUnavailableError):
+        client.enqueue("c", lambda text: None)
+    assert [entry[0] for entry in client.pending] == ["a", "b"]
+
+
+def test_failing_callback_reports_error_and_keeps_draining():
+    client, backend = make_client(threshold=1, reset_after=0.05)
+    client.breaker.record_failure()
+    errors, results = [], []
+
+    def explode(text):
+        raise ValueError("unparseable")
+
+    client.enqueue("a", explode, errors.append)
+    client.enqueue("b", results.append, errors.append)
+    assert wait_for(lambda: results)
+    assert [str(e) for e in errors] == ["unparseable"]
+    assert not client.pending
+
+
+def test_prompt_that_keeps_failing_is_given_up_after_drain_attempts():
+    client, backend = make_client(
+        script=[TransientLLMError("timeout"), TransientLLMError("timeout")],
+        threshold=100, reset_after=0.01, max_retries=0, drain_attempts=2
+    )
+    errors, results = [], []
+    client.enqueue("a", results.append, errors.append)
+    client.enqueue("b", results.append, errors.append)
+    assert wait_for(lambda: results)
+    assert len(errors) == 1 and isinstance(errors[0], LLMUnavailableError)
+    assert backend.calls == ["a", "a", "b"]
@@ -0,0 +1,67 @@
+from throttle import SlidingWindowLimiter, InMemoryBackend, submission_rules, content_hash
+
+
+def test_allows_up_to_limit_then_rejects():
+    limiter = SlidingWindowLimiter()
+    rules = [("email:a", 2, 60)]
+    assert limiter.hit(rules, now=0) is None
+    assert limiter.hit(rules, now=1) is None
+    retry_after = limiter.hit(rules, now=2)
+    # Both hits have to slide halfway out of the next window before a third fits
+    assert retry_after == 89
+
+
+def test_previous_window_is_weighted_by_overlap():
+    limiter = SlidingWindowLimiter()
+    rules = [("email:a", 2, 60)]
+    limiter.hit(rules, now=50)
+    limiter.hit(rules, now=55)
+    # 10% into the next window, 90% of the previous two hits still count
+    assert limiter.hit(rules, now=66) is not None
+    # 60% in, only 0.8 of them count
+    assert limiter.hit(rules, now=96) is None
+
+
+def test_rejected_requests_are_not_counted():
+    limiter = SlidingWindowLimiter()
+    rules = [("email:a", 1, 60)]
+    assert limiter.hit(rules, now=0) is None
+    for t in range(1, 5):
+        assert limiter.hit(rules, now=t) is not None
+    assert limiter.hit(rules, now=120) is None
+
+
+def test_any_rule_over_limit_rejects_and_counts_none():
+    backend = InMemoryBackend()
+    limiter = SlidingWindowLimiter(backend)
+    limiter.hit([("ip:1", 1, 60)], now=0)
+    assert limiter.hit([("email:a", 5, 60), ("ip:1", 1, 60)], now=1) is not None
+    assert backend.get("email:a:0") == 0
+
+
+def test_submission_rules_normalise_email():
+    assert submission_rules(" A@X.com ", "1.2.3.4", 7)[0][0] == "email:a@x.com"
+
+
+def test_content_hash_is_stable():
+    assert content_hash(b"pdf") == content_hash(b"pdf")
+    assert content_hash(b"pdf") != content_hash(b"pdf2")
+
+
+def test_retry_after_is_when_the_window_has_room():
+    limiter = SlidingWindowLimiter()
+    rules = [("email:a", 5, 3600)]
+    for t in range(5):
+        assert limiter.hit(rules, now=t) is None
+    retry_after = limiter.hit(rules, now=19)
+    # Rejected until 20% into the next bucket, when only 4 of the 5 hits still count
+    assert limiter.hit(rules, now=19 + retry_after - 2) is not None
+    assert limiter.hit(rules, now=19 + retry_after) is None
+
+
+def test_retry_after_is_the_longest_wait_across_rules():
+    limiter = SlidingWindowLimiter()
+    limiter.hit([("email:a", 1, 60), ("ip:1", 1, 3600)], now=0)
+    retry_after = limiter.hit([("email:a", 1, 60), ("ip:1", 1, 3600)], now=1)
+    assert retry_after == limiter.hit([("ip:1", 1, 3600)], now=1)
+    assert limiter.hit([("email:a", 1, 60), ("ip:1", 1, 3600)], now=1 + retry_after) is None
@@ -0,0 +1,206 @@
+import io
+import time
+import sqlite3
+import pytest
+from PyPDF2 import PdfWriter
+import evaluation
+import llm_client
+import worker
+from llm_client import LLMClient, FakeBackend, AdaptiveTokenBucket, CircuitBreaker, TransientLLMError
+from throttle import SlidingWindowLimiter, THROTTLE_EMAIL_LIMIT, content_hash
+
+
+@pytest.fixture(autouse=True)
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(evaluation, "DB_PATH", str(tmp_path / "ats.db"))
+    evaluation.create_tables()
+    conn = sqlite3.connect(evaluation.DB_PATH)
+    conn.execute("INSERT INTO job_descriptions (title, description) VALUES ('Engineer', 'Python')")
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(llm_client.random, "uniform", lambda a, b: 0)
+    monkeypatch.setattr(worker, "submission_limiter", SlidingWindowLimiter())
+    worker.reserved.clear()
+    worker.queued_ids.clear()
+    worker.draining.clear()
+    yield
+    llm_client.set_client(None)
+
+
+@pytest.fixture(autouse=True)
+def pool(monkeypatch):
+    monkeypatch.setattr(worker, "EVAL_WORKERS", 2)
+    worker.start_pool()
+    yield
+    worker.pool.shutdown(wait=False, cancel_futures=True)
+
+
+@pytest.fixture
+def client():
+    return worker.worker.test_client()
+
+
+def use_backend(script=None, threshold=5, reset_after=30, drain_attempts=3):
+    backend = FakeBackend(script=script)
+    llm_client.set_client(LLMClient(
+        backend,
+        limiter=AdaptiveTokenBucket(rate=100, capacity=100),
+        breaker=CircuitBreaker(threshold=threshold, reset_after=reset_after),
+        max_retries=0,
+        drain_attempts=drain_attempts
+    ))
+    return backend
+
+
+def make_pdf(title="Resume"):
+    writer = PdfWriter()
+    writer.add_blank_page(width=72, height=72)
+    writer.add_metadata({"/Title": title})
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def post_resume(client, pdf, job_description_id=1):
+    return client.post("/evaluate", data={
+        "name": "Ada",
+        "email": "ada@example.com",
+        "job_description_id": str(job_description_id),
+        "resume": (io.BytesIO(pdf), "resume.pdf"),
+    }, content_type="multipart/form-data")
+
+
+def rows():
+    conn = sqlite3.connect(evaluation.DB_PATH)
+    result = conn.execute("SELECT id, match_percent FROM results ORDER BY id").fetchall()
+    conn.close()
+    return result
+
+
+def wait_for(condition, timeout=5.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+# --- /evaluate ---
+def test_evaluation_is_completed_and_saved(client):
+    use_backend()
+    response = post_resume(client, make_pdf())
+    assert response.status_code == 200
+    assert response.json["status"] == "completed"
+    assert response.json["result"]["JD Match"] == "50%"
+    assert rows() == [(response.json["id"], "50%")]
+
+
+def test_unknown_job_description_is_rejected(client):
+    use_backend()
+    assert post_resume(client, make_pdf(), job_description_id=99).status_code == 400
+
+
+def test_same_resume_is_a_duplicate(client):
+    backend = use_backend()
+    pdf = make_pdf()
+    first = post_resume(client, pdf).json
+    second = post_resume(client, pdf).json
+    assert second == {"status": "duplicate", "id": first["id"], "pending": False}
+    assert len(backend.calls) == 1
+
+
+def test_resume_being_evaluated_is_a_pending_duplicate(client):
+    backend = use_backend()
+    pdf = make_pdf()
+    worker.reserved.add((content_hash(pdf), 1))
+    assert post_resume(client, pdf).json == {"status": "duplicate", "id": None, "pending": True}
+    assert backend.calls == []
+
+
+def test_degraded_llm_queues_a_pending_row(client):
+    use_backend(script=[TransientLLMError("down")], threshold=1, reset_after=60)
+    pdf = make_pdf()
+    response = post_resume(client, pdf).json
+    assert response["status"] == "pending"
+    assert rows() == [(response["id"], "Pending")]
+    assert post_resume(client, pdf).json == {"status": "duplicate", "id": response["id"], "pending": True}
+
+
+def test_failed_evaluation_can_be_resubmitted(client):
+    use_backend(
+        script=[TransientLLMError("down"), TransientLLMError("still down")],
+        threshold=1, reset_after=0.05, drain_attempts=1
+    )
+    pdf = make_pdf()
+    pending_id = post_resume(client, pdf).json["id"]
+    assert wait_for(lambda: rows() == [(pending_id, "Failed")])
+
+    time.sleep(0.1)
+    response = post_resume(client, pdf).json
+    assert response["status"] == "completed"
+    assert rows() == [(response["id"], "50%")]
+
+
+# --- /throttle ---
+def test_throttle_rejects_after_email_limit(client):
+    form = {"email": "ada@example.com", "ip": "10.0.0.1", "job_description_id": "1"}
+    for _ in range(THROTTLE_EMAIL_LIMIT):
+        assert client.post("/throttle", data=form).json["retry_after"] is None
+    assert client.post("/throttle", data=form).json["retry_after"] > 0
+
+
+def test_throttle_requires_fields(client):
+    assert client.post("/throttle", data={"email": "ada@example.com"}).status_code == 400
+
+
+# --- Health ---
+def test_readyz_reports_ready(client):
+    use_backend()
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.json["pool"]["healthy"]
+
+
+def test_readyz_unavailable_while_draining(client):
+    use_backend()
+    worker.draining.set()
+    assert client.get("/readyz").status_code == 503
+
+
+def test_readyz_rebuilds_a_broken_pool(client):
+    use_backend()
+    restarts = worker.pool_restarts
+    worker.pool.shutdown()
+    assert client.get("/readyz").status_code == 503
+    assert worker.pool_restarts == restarts + 1
+    assert client.get("/readyz").status_code == 200
+
+
+# --- PDF pool ---
+def test_dead_pool_process_is_replaced_and_parse_retried():
+    old = worker.pool
+    assert worker.extract_text(make_pdf()) == ""
+    for process in list(old._processes.values()):
+        process.kill()
+    assert worker.extract_text(make_pdf()) == ""
+    assert worker.pool is not old
+
+
+def test_wedged_parses_recycle_the_pool(monkeypatch):
+    # Runs time.sleep(10) in a pool process, which outlives the parse timeout
+    monkeypatch.setattr(evaluation, "extract_resume_text", time.sleep)
+    monkeypatch.setattr(worker, "EVAL_PDF_TIMEOUT", 0.5)
+    monkeypatch.setattr(worker, "EVAL_WORKERS", 4)
+    worker.recycle_pool(worker.pool, "test needs 4 processes")
+    old = worker.pool
+    with pytest.raises(worker.PoolTimeoutError):
+        worker.extract_text(10)
+    processes = list(old._processes.values())
+    assert worker.pool is old and worker.wedged_count() == 1
+    # A second wedged parse ties up half of the 4 processes
+    with pytest.raises(worker.PoolTimeoutError):
+        worker.extract_text(10)
+    assert worker.pool is not old
+    assert wait_for(lambda: not any(process.is_alive() for process in processes))
+    assert worker.wedged_count() == 0
@@ -0,0 +1,111 @@
+import os
+import time
+import hashlib
+import threading
+
+# Sliding-window submission throttling for the candidate portal.
+# Counters live behind a small backend interface (incr/get on bucketed keys)
+# so the in-process store can later be swapped for a shared one such as Redis.
+
+THROTTLE_EMAIL_LIMIT = int(os.getenv("THROTTLE_EMAIL_LIMIT", "5"))
+THROTTLE_EMAIL_WINDOW = int(os.getenv("THROTTLE_EMAIL_WINDOW", "3600"))
+THROTTLE_IP_LIMIT = int(os.getenv("THROTTLE_IP_LIMIT", "20"))
+THROTTLE_IP_WINDOW = int(os.getenv("THROTTLE_IP_WINDOW", "3600"))
+THROTTLE_JD_LIMIT = int(os.getenv("THROTTLE_JD_LIMIT", "100"))
+THROTTLE_JD_WINDOW = int(os.getenv("THROTTLE_JD_WINDOW", "600"))
+
+
+# --- Backends ---
+class InMemoryBackend:
+    """Per-process counter store. Each bucket expires after `ttl` seconds."""
+
+    def __init__(self):
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+
+    def get(self, key):
+        with self._lock:
+            entry = self.counters.get(key)
+            if not entry or entry[1] <= time.monotonic():
+                return 0
+            return entry[0]
+
+    def incr(self, key, ttl):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_prune > 60:
+                self.counters = {k: v for k, v in self.counters.items() if v[1] > now}
+                self._last_prune = now
+            count, expires = self.counters.get(key, (0, now + ttl))
+            if expires <= now:
+                count, expires = 0, now + ttl
+            self.counters[key] = (count + 1, expires)
+            return count + 1
+
+
+# --- Sliding window limiter ---
+class SlidingWindowLimiter:
+    """Approximate sliding window built from the current and previous fixed buckets.
+
+    The previous bucket's count is weighted by how much of it still overlaps
+    the window, which keeps memory at two counters per key.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or InMemoryBackend()
+        self._lock = threading.Lock()
+
+    def _estimate(self, name, window, now):
+        bucket = int(now // window)
+        current = self.backend.get(f"{name}:{bucket}")
+        previous = self.backend.get(f"{name}:{bucket - 1}")
+        overlap = 1 - (now % window) / window
+        return previous * overlap + current
+
+    def _wait(self, name, limit, window, now):
+        """Seconds until one more request fits, assuming no others arrive meanwhile."""
+        bucket = int(now // window)
+        start = bucket * window
+        current = self.backend.get(f"{name}:{bucket}")
+        previous = self.backend.get(f"{name}:{bucket - 1}")
+        room = limit - 1 - current
+        if room >= 0 and previous:
+            # Fits later in this bucket, once enough of the previous one has slid out
+            at = start + (1 - room / previous) * window
+        else:
+            # This bucket becomes the previous one and has to slide out far enough
+            fraction = max(0, 1 - (limit - 1) / current) if current else 0
+            at = start + window + fraction * window
+        return int(at - now) + 1
+
+    def hit(self, rules, now=None):
+        """Count one request against every (name, limit, window) rule.
+
+        Returns None when allowed, or the number of seconds until every rule
+        has room again when any is over its limit. Rejected requests are not counted.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            waits = [
+                self._wait(name, limit, window, now)
+                for name, limit, window in rules
+                if self._estimate(name, window, now) + 1 > limit
+            ]
+            if waits:
+                return max(waits)
+            for name, limit, window in rules:
+                self.backend.incr(f"{name}:{int(now // window)}", ttl=2 * window)
+        return None
+
+
+def submission_rules(email, ip, jd_id):
+    return [
+        (f"email:{email.strip().lower()}", THROTTLE_EMAIL_LIMIT, THROTTLE_EMAIL_WINDOW),
+        (f"ip:{ip}", THROTTLE_IP_LIMIT, THROTTLE_IP_WINDOW),
+        (f"jd:{jd_id}", THROTTLE_JD_LIMIT, THROTTLE_JD_WINDOW),
+    ]
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
@@ -0,0 +1,393 @@
+import os
+import signal
+import sqlite3
+import logging
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as PoolTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from json import JSONDecodeError
+from flask import Flask, request, jsonify
+from werkzeug.serving import make_server
+from llm_client import get_client, LLMUnavailableError, LLM_BACKEND
+from throttle import SlidingWindowLimiter, submission_rules, content_hash
+import evaluation
+
+# Local evaluation worker service. Both front ends post resumes here; this
+# process owns the LLM client, the submission throttle, the dedup lookup and
+# every evaluation write (new results and Pending/Failed updates). The admin
+# panel still manages job descriptions itself, including deleting a JD's
+# results, and each process runs create_tables() on startup.
+# PDF parsing is CPU bound and runs in a process pool; Gemini calls are I/O
+# bound and run on request threads through the shared, rate limited client.
+
+EVAL_WORKER_HOST = os.getenv("EVAL_WORKER_HOST", "127.0.0.1")
+EVAL_WORKER_PORT = int(os.getenv("EVAL_WORKER_PORT", "8765"))
+EVAL_WORKERS = int(os.getenv("EVAL_WORKERS", str(os.cpu_count() or 2)))
+EVAL_MAX_INFLIGHT = int(os.getenv("EVAL_MAX_INFLIGHT", str(EVAL_WORKERS * 4)))
+EVAL_PDF_TIMEOUT = float(os.getenv("EVAL_PDF_TIMEOUT", "30"))
+EVAL_SHUTDOWN_TIMEOUT = float(os.getenv("EVAL_SHUTDOWN_TIMEOUT", "60"))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("worker")
+
+worker = Flask(__name__)
+
+pool = None
+pool_lock = threading.Lock()
+pool_restarts = 0
+# PDF parses that timed out; their processes may still be busy with them
+stuck_tasks = []
+draining = threading.Event()
+write_lock = threading.Lock()
+inflight = 0
+inflight_cond = threading.Condition()
+queued_ids = set()
+queued_lock = threading.Lock()
+# Submission throttle counters live here so every front-end process shares the same limits
+submission_limiter = SlidingWindowLimiter()
+# (resume_sha256, job_description_id) pairs currently being evaluated, guarded by write_lock
+reserved = set()
+
+
+def new_pool():
+    return ProcessPoolExecutor(max_workers=EVAL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+
+def start_pool():
+    global pool
+    with pool_lock:
+        pool = new_pool()
+        stuck_tasks.clear()
+
+
+# Replace `old` with a fresh pool (unless another thread already did) and kill its processes
+def recycle_pool(old, reason):
+    global pool, pool_restarts
+    with pool_lock:
+        if pool is not old:
+            return
+        pool = new_pool()
+        stuck_tasks.clear()
+        pool_restarts += 1
+    logger.warning(f"Restarted PDF process pool: {reason}")
+    terminate_processes(old)
+    old.shutdown(wait=False)
+
+
+# A running task can't be cancelled, so wedged processes have to be terminated.
+# Python 3.14 added terminate_workers(); older versions only expose _processes.
+def terminate_processes(executor):
+    terminate = getattr(executor, "terminate_workers", None)
+    if terminate:
+        terminate()
+    else:
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+
+
+def wedged_count():
+    with pool_lock:
+        stuck_tasks[:] = [f for f in stuck_tasks if not f.done()]
+        return len(stuck_tasks)
+
+
+# Parse a PDF in the pool; a broken pool is rebuilt and the parse retried once
+def extract_text(resume_binary):
+    for attempt in range(2):
+        current = pool
+        try:
+            future = current.submit(evaluation.extract_resume_text, resume_binary)
+            return future.result(timeout=EVAL_PDF_TIMEOUT)
+        except BrokenProcessPool:
+            recycle_pool(current, "a pool process died")
+            if attempt:
+                raise
+        except PoolTimeoutError:
+            with pool_lock:
+                if pool is current:
+                    stuck_tasks.append(future)
+            # Recycle once half the processes are tied up by parses that never finished
+            if wedged_count() * 2 >= EVAL_WORKERS:
+                recycle_pool(current, "PDF parses timed out")
+            raise
+
+
+# Submitting a no-op raises immediately if the pool is broken, without waiting on busy processes
+def pool_health():
+    current = pool
+    broken = False
+    try:
+        current.submit(int).cancel()
+    except (BrokenProcessPool, RuntimeError):
+        broken = True
+    if broken and not draining.is_set():
+        recycle_pool(current, "pool found broken by readiness check")
+    wedged = wedged_count()
+    return {
+        "workers": EVAL_WORKERS,
+        "wedged": wedged,
+        "restarts": pool_restarts,
+        "broken": broken,
+        "healthy": not broken and wedged < EVAL_WORKERS,
+    }
+
+
+# Admission control: cap concurrent evaluations and refuse new work while draining
+def admit():
+    global inflight
+    with inflight_cond:
+        if draining.is_set() or inflight >= EVAL_MAX_INFLIGHT:
+            return False
+        inflight += 1
+        return True
+
+
+def release():
+    global inflight
+    with inflight_cond:
+        inflight -= 1
+        inflight_cond.notify_all()
+
+
+def complete_pending(result_id, text):
+    with queued_lock:
+        queued_ids.discard(result_id)
+    try:
+        with write_lock:
+            evaluation.complete_pending_result(result_id, text)
+    except JSONDecodeError:
+        fail_pending(result_id, "could not parse evaluation output")
+
+
+def fail_pending(result_id, reason):
+    with queued_lock:
+        queued_ids.discard(result_id)
+    with write_lock:
+        evaluation.fail_pending_result(result_id, reason)
+
+
+# Hand a Pending row's prompt to the LLM client's retry queue
+def queue_evaluation(result_id, prompt):
+    with queued_lock:
+        if result_id in queued_ids:
+            return
+        queued_ids.add(result_id)
+    try:
+        get_client().enqueue(
+            prompt,
+            lambda text: complete_pending(result_id, text),
+            lambda error: fail_pending(result_id, error)
+        )
+    except LLMUnavailableError:
+        with queued_lock:
+            queued_ids.discard(result_id)
+        raise
+
+
+# Re-queue Pending rows left over from a previous run, rebuilding each prompt from the stored resume
+def resume_pending():
+    for result_id in evaluation.pending_result_ids():
+        row = evaluation.get_pending_result(result_id)
+        if not row:
+            continue
+        resume_binary, jd_text = row
+        if jd_text is None:
+            fail_pending(result_id, "job description no longer exists")
+            continue
+        try:
+            resume_text = extract_text(resume_binary)
+        except Exception as e:
+            fail_pending(result_id, f"error reading PDF: {e}")
+            continue
+        prompt = evaluation.build_prompt(resume_text, jd_text)
+        while not draining.is_set():
+            try:
+                queue_evaluation(result_id, prompt)
+                break
+            except LLMUnavailableError:
+                # Retry queue is full; wait for it to drain
+                time.sleep(5)
+        if draining.is_set():
+            return
+
+
+def run_evaluation(name, email, job_description_id, resume_name, resume_binary):
+    resume_sha256 = content_hash(resume_binary)
+
+    jd_text = evaluation.get_job_description(job_description_id)
+    if jd_text is None:
+        return jsonify({"error": "Invalid job description ID"}), 400
+
+    # Reserve the hash before any parsing so concurrent identical uploads can't both run
+    key = (resume_sha256, job_description_id)
+    with write_lock:
+        existing = None if key in reserved else evaluation.find_result_by_hash(resume_sha256, job_description_id)
+        duplicate = key in reserved or existing is not None
+        if not duplicate:
+            reserved.add(key)
+    if duplicate:
+        # A Pending match is already in the durable queue, so it will still be evaluated
+        return jsonify({
+            "status": "duplicate",
+            "id": existing[0] if existing else None,
+            "pending": existing is None or existing[1] == "Pending"
+        })
+
+    try:
+        return evaluate_reserved(name, email, job_description_id, resume_name, resume_binary, resume_sha256, jd_text)
+    finally:
+        with write_lock:
+            reserved.discard(key)
+
+
+def evaluate_reserved(name, email, job_description_id, resume_name, resume_binary, resume_sha256, jd_text):
+    try:
+        resume_text = extract_text(resume_binary)
+    except PoolTimeoutError:
+        return jsonify({"error": "Timed out reading PDF"}), 422
+    except Exception as e:
+        return jsonify({"error": f"Error reading PDF: {e}"}), 422
+
+    prompt = evaluation.build_prompt(resume_text, jd_text)
+    client = get_client()
+    try:
+        ats_result = evaluation.parse_evaluation(client.generate(prompt))
+    except JSONDecodeError:
+        return jsonify({"error": "Failed to parse evaluation output"}), 502
+    except LLMUnavailableError as llm_error:
+        # Gemini is degraded: save a Pending row (the durable queue) and let the client retry it
+        logger.warning(f"Gemini unavailable, queueing evaluation: {llm_error}")
+        with write_lock:
+            result_id = evaluation.save_result(
+                name, email, job_description_id, resume_name, resume_binary, resume_sha256,
+                {"JD Match": "Pending", "Profile Summary": "Evaluation queued."}
+            )
+        try:
+            queue_evaluation(result_id, prompt)
+        except LLMUnavailableError:
+            with write_lock:
+                evaluation.delete_result(result_id)
+            return jsonify({"error": "Evaluation service is busy, please try again later"}), 503, {"Retry-After": "60"}
+        with write_lock:
+            evaluation.delete_failed_results(resume_sha256, job_description_id, result_id)
+        return jsonify({"status": "pending", "id": result_id})
+
+    with write_lock:
+        result_id = evaluation.save_result(
+            name, email, job_description_id, resume_name, resume_binary, resume_sha256, ats_result
+        )
+        evaluation.delete_failed_results(resume_sha256, job_description_id, result_id)
+    return jsonify({"status": "completed", "id": result_id, "result": ats_result})
+
+
+# Evaluate one resume: multipart form with name, email, job_description_id and resume
+@worker.route("/evaluate", methods=["POST"])
+def evaluate():
+    if not admit():
+        return jsonify({"error": "Evaluation service is busy, please try again later"}), 503, {"Retry-After": "5"}
+    try:
+        try:
+            name = request.form["name"]
+            email = request.form["email"]
+            job_description_id = int(request.form["job_description_id"])
+            file = request.files["resume"]
+        except (KeyError, ValueError) as e:
+            return jsonify({"error": f"Invalid request: {e}"}), 400
+        return run_evaluation(name, email, job_description_id, file.filename, file.read())
+    except Exception as e:
+        logger.exception("Evaluation failed")
+        return jsonify({"error": str(e)}), 500
+    finally:
+        release()
+
+
+# Count one portal submission against the per-email / IP / JD limits
+@worker.route("/throttle", methods=["POST"])
+def throttle():
+    try:
+        rules = submission_rules(request.form["email"], request.form["ip"], int(request.form["job_description_id"]))
+    except (KeyError, ValueError) as e:
+        return jsonify({"error": f"Invalid request: {e}"}), 400
+    return jsonify({"retry_after": submission_limiter.hit(rules)})
+
+
+# Liveness: the process is up and serving
+@worker.route("/healthz", methods=["GET"])
+def healthz():
+    return jsonify({"status": "ok"})
+
+
+# Readiness: accepting work, DB reachable, PDF pool usable, plus LLM and queue state
+@worker.route("/readyz", methods=["GET"])
+def readyz():
+    client = get_client()
+    status = {
+        "draining": draining.is_set(),
+        "inflight": inflight,
+        "max_inflight": EVAL_MAX_INFLIGHT,
+        "pool": pool_health(),
+        "llm_circuit": client.breaker.state,
+        "llm_rate": round(client.limiter.rate, 3),
+        "pending": len(client.pending),
+    }
+    try:
+        conn = sqlite3.connect(evaluation.DB_PATH)
+        conn.execute("SELECT 1")
+        conn.close()
+    except sqlite3.Error as e:
+        status["db_error"] = str(e)
+    ready = not status["draining"] and "db_error" not in status and status["pool"]["healthy"]
+    status["status"] = "ready" if ready else "unavailable"
+    return jsonify(status), 200 if ready else 503
+
+
+def shutdown(server):
+    draining.set()
+    server.shutdown()
+
+
+def main():
+    if LLM_BACKEND == "gemini" and not os.getenv("GOOGLE_API_KEY"):
+        raise Exception("GOOGLE_API_KEY is not set")
+
+    evaluation.create_tables()
+    get_client()
+    start_pool()
+    threading.Thread(target=resume_pending, name="resume-pending", daemon=True).start()
+
+    server = make_server(EVAL_WORKER_HOST, EVAL_WORKER_PORT, worker, threaded=True)
+
+    # serve_forever() blocks the main thread, so shutdown has to come from another one
+    def handle_signal(signum, frame):
+        logger.info(f"Received signal {signum}, draining")
+        threading.Thread(target=shutdown, args=(server,), daemon=True).start()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    logger.info(f"Evaluation worker listening on {EVAL_WORKER_HOST}:{EVAL_WORKER_PORT} with {EVAL_WORKERS} processes")
+    server.serve_forever()
+
+    # Let in-flight evaluations finish before tearing down the pool
+    with inflight_cond:
+        finished = inflight_cond.wait_for(lambda: inflight == 0, timeout=EVAL_SHUTDOWN_TIMEOUT)
+        if not finished:
+            logger.warning(f"Shutting down with {inflight} evaluations still running")
+    # Waiting on the pool would block on parses that never finish, so kill it instead
+    wedged = wedged_count()
+    if not finished or wedged:
+        logger.warning(f"Terminating PDF processes ({wedged} wedged)")
+        terminate_processes(pool)
+        pool.shutdown(wait=False, cancel_futures=True)
+    else:
+        pool.shutdown(wait=True)
+    pending = len(get_client().pending)
+    if pending:
+        logger.warning(f"{pending} queued evaluations stay Pending and will be resumed on next start")
+    logger.info("Evaluation worker stopped")
+
+
+if __name__ == "__main__":
+    main()
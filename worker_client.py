@@ -0,0 +1,72 @@
+import os
+import requests
+from dotenv import load_dotenv
+
+# Front-end side of the evaluation worker (see worker.py).
+
+load_dotenv()
+
+EVAL_WORKER_URL = os.getenv("EVAL_WORKER_URL", "http://127.0.0.1:8765")
+EVAL_WORKER_TIMEOUT = float(os.getenv("EVAL_WORKER_TIMEOUT", "120"))
+
+
+class WorkerError(Exception):
+    def __init__(self, message, status_code=500, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def submit_evaluation(name, email, job_description_id, resume_name, resume_binary):
+    """Send a resume to the worker and return its JSON reply.
+
+    The reply's "status" is "completed" (with "result"), "pending" or "duplicate".
+    Raises WorkerError with the worker's status code when it refuses the request.
+    """
+    try:
+        response = requests.post(
+            f"{EVAL_WORKER_URL}/evaluate",
+            data={"name": name, "email": email, "job_description_id": job_description_id},
+            files={"resume": (resume_name, resume_binary, "application/pdf")},
+            timeout=EVAL_WORKER_TIMEOUT
+        )
+    except requests.RequestException as e:
+        raise WorkerError(f"Evaluation worker unreachable: {e}", status_code=503)
+
+    try:
+        payload = response.json()
+    except ValueError:
+        payload = {"error": response.text}
+    if response.status_code != 200:
+        raise WorkerError(
+            payload.get("error", "Evaluation failed"),
+            status_code=response.status_code,
+            retry_after=response.headers.get("Retry-After")
+        )
+    return payload
+
+
+def check_submission(email, ip, job_description_id):
+    """Count a portal submission in the worker's shared throttle.
+
+    Returns the seconds to wait when a limit is exceeded, otherwise None.
+    An unreachable worker isn't treated as throttling; the evaluation call
+    that follows reports it.
+    """
+    try:
+        response = requests.post(
+            f"{EVAL_WORKER_URL}/throttle",
+            data={"email": email, "ip": ip or "", "job_description_id": job_description_id},
+            timeout=5
+        )
+        response.raise_for_status()
+    except requests.RequestException:
+        return None
+    return response.json().get("retry_after")
+
+
+def worker_ready():
+    try:
+        return requests.get(f"{EVAL_WORKER_URL}/readyz", timeout=2).status_code == 200
+    except requests.RequestException:
+        return False